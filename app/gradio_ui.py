@@ -1,11 +1,13 @@
 import os
 import gradio as gr
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 from typing import Dict, List, Any
 
-from app.modules.analyzer import MergeRequestAnalyzer
+from app.modules.analyzer import BATCH_MAX_SIZE, MergeRequestAnalyzer
 from app.modules.gh_fetcher import GithubFetcher
+from app.modules.llm_cache import MemoryBackend
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +17,20 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
     raise ValueError("GITHUB_TOKEN environment variable is missing. Please check your .env file.")
 
+# ETags of GitHub search pages, shared by the per-request fetchers for the life of the UI process
+GITHUB_ETAG_CACHE = MemoryBackend()
+
+# Number of pull requests analyzed concurrently (each analysis is a blocking API call)
+ANALYSIS_MAX_WORKERS = 8
+
+# Markdown header and analysis key of each bulleted report section
+RESULT_SECTIONS = (
+    ("### Quality Issues", "quality_issues"),
+    ("### Good Practices", "good_practices"),
+    ("### Design Patterns Used", "patterns"),
+    ("### Anti-patterns", "anti_patterns"),
+)
+
 def format_analysis_result(analysis: Dict[str, Any]) -> str:
     """Format the analysis results into a markdown string."""
     if "error" in analysis:
@@ -32,33 +48,13 @@ def format_analysis_result(analysis: Dict[str, Any]) -> str:
     score = analysis.get("overall_score", "N/A")
     markdown.append(f"## Overall Score: {score}/10\n")
     
-    # Quality Issues
-    if analysis.get("quality_issues"):
-        markdown.append("### Quality Issues")
-        for issue in analysis["quality_issues"]:
-            markdown.append(f"- {issue}")
-        markdown.append("")
-    
-    # Good Practices
-    if analysis.get("good_practices"):
-        markdown.append("### Good Practices")
-        for practice in analysis["good_practices"]:
-            markdown.append(f"- {practice}")
-        markdown.append("")
-    
-    # Design Patterns
-    if analysis.get("patterns"):
-        markdown.append("### Design Patterns Used")
-        for pattern in analysis["patterns"]:
-            markdown.append(f"- {pattern}")
-        markdown.append("")
-    
-    # Anti-patterns
-    if analysis.get("anti_patterns"):
-        markdown.append("### Anti-patterns")
-        for anti_pattern in analysis["anti_patterns"]:
-            markdown.append(f"- {anti_pattern}")
-        markdown.append("")
+    # Bulleted sections, each rendered with a single join
+    for header, key in RESULT_SECTIONS:
+        items = analysis.get(key)
+        if items:
+            markdown.append(header)
+            markdown.append("- " + "\n- ".join(map(str, items)))
+            markdown.append("")
     
     return "\n".join(markdown)
 
@@ -72,7 +68,7 @@ def analyze_prs(
     try:
         # Initialize components
         analyzer = MergeRequestAnalyzer()
-        fetcher = GithubFetcher(repo_name=repo_name, github_token=GITHUB_TOKEN)
+        fetcher = GithubFetcher(repo_name=repo_name, github_token=GITHUB_TOKEN, etag_cache=GITHUB_ETAG_CACHE)
         
         # Parse dates
         start = datetime.fromisoformat(start_date)
@@ -84,11 +80,20 @@ def analyze_prs(
         if not pr_data_list:
             return "No pull requests found for the specified criteria."
         
-        # Analyze each PR
-        results = []
-        for pr_data in pr_data_list:
-            analysis = analyzer.analyze_pull_request(pr_data)
-            results.append(format_analysis_result(analysis))
+        # Pack PRs into batches (one API call each) and analyze the batches
+        # concurrently; map() keeps results in input order
+        batches = [
+            pr_data_list[i:i + BATCH_MAX_SIZE]
+            for i in range(0, len(pr_data_list), BATCH_MAX_SIZE)
+        ]
+        max_workers = min(ANALYSIS_MAX_WORKERS, len(batches))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            analyses = [
+                analysis
+                for batch in executor.map(analyzer.analyze_pull_requests_batch, batches)
+                for analysis in batch
+            ]
+        results = [format_analysis_result(analysis) for analysis in analyses]
         
         return "\n\n---\n\n".join(results)
     
@@ -1,9 +1,15 @@
 import os
+import asyncio
 import json
 import re
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass
+from itertools import chain, cycle
 from dotenv import load_dotenv
 from typing import Dict, List, Any, Optional, Tuple
-from yandex_cloud_ml_sdk import YCloudML
+from app.modules import json_codec
+from app.modules.llm_cache import LLMCache, MemoryBackend, content_digest, normalize_prompt
 import logging
 
 # Configure logging
@@ -19,81 +25,47 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-API_KEY = os.getenv("YANDEX_CLOUD_API_KEY")
-FOLDER_ID = os.getenv("YANDEX_CLOUD_FOLDER_ID")
-MODEL_NAME = os.getenv("YANDEX_CLOUD_MODEL_NAME")
+@dataclass(frozen=True, slots=True)
+class _Config:
+    """Yandex Cloud settings, read from the environment and validated once at import."""
+    api_key: str
+    folder_id: str
+    model_name: str
 
-if not API_KEY or not FOLDER_ID or not MODEL_NAME:
-    raise ValueError("Missing environment variables. Please check your .env file.")
+def _load_config() -> _Config:
+    api_key = os.getenv("YANDEX_CLOUD_API_KEY")
+    folder_id = os.getenv("YANDEX_CLOUD_FOLDER_ID")
+    model_name = os.getenv("YANDEX_CLOUD_MODEL_NAME")
+    if not api_key or not folder_id or not model_name:
+        raise ValueError("Missing environment variables. Please check your .env file.")
+    return _Config(api_key=api_key, folder_id=folder_id, model_name=model_name)
 
-class MergeRequestAnalyzer:
-    """Main class for analyzing merge request quality"""
-    
-    def __init__(self):
-        logger.info("Initializing MergeRequestAnalyzer")
-        self.api_key = API_KEY
-        self.folder_id = FOLDER_ID
-        self.model_name = MODEL_NAME
-        self.sdk = YCloudML(folder_id=self.folder_id, auth=self.api_key)
-        logger.info("Successfully initialized MergeRequestAnalyzer")
-        
-    def call_yandex_cloud_api(self, prompt: str, temperature: float = 0.2) -> Dict[str, Any]:
-        """
-        Call Yandex Cloud API with the given prompt using the SDK
-        
-        Args:
-            prompt: The prompt to send to the API
-            temperature: Temperature parameter for generation (lower = more deterministic)
-            
-        Returns:
-            The API response
-        """
-        logger.info("Calling Yandex Cloud API")
-        try:
-            # Check if we have valid credentials
-            if not self.api_key or not self.folder_id or not self.model_name:
-                logger.error("Missing required API credentials")
-                return {"error": "Missing required API credentials"}
-            
-            # Truncate prompt if too long
-            max_prompt_length = 32000
-            if len(prompt) > max_prompt_length:
-                logger.warning(f"Prompt too long ({len(prompt)} chars), truncating to {max_prompt_length} chars")
-                prompt = prompt[:max_prompt_length]
-            
-            model = self.sdk.models.completions(self.model_name, model_version="latest")
-            model = model.configure(temperature=temperature, max_tokens=1500)
-            
-            logger.info(f"Sending request to model: {self.model_name}")
-            result = model.run(
-                [
-                    {"role": "system", "text": "You are a code review expert providing detailed analysis of code changes."},
-                    {"role": "user", "text": prompt}
-                ]
-            )
-            
-            # Get the first alternative as our response
-            alternatives = [alt for alt in result]
-            if alternatives:
-                logger.info(f"Successfully received response from Yandex Cloud API with {len(alternatives)} alternatives")
-                return {"result": {"alternatives": alternatives}}
-            else:
-                logger.warning("No alternatives returned from the model")
-                return {"error": "No alternatives returned from the model"}
-            
-        except ConnectionError as ce:
-            logger.error(f"Connection error: {str(ce)}")
-            return {"error": f"Connection error: {str(ce)}"}
-        except TimeoutError as te:
-            logger.error(f"API request timed out: {str(te)}")
-            return {"error": f"API request timed out: {str(te)}"}
-        except Exception as e:
-            logger.error(f"API request failed: {str(e)}", exc_info=True)
-            return {"error": f"API request failed: {str(e)}"}
-    
-    def _build_analysis_prompt(self, diff_content: str) -> str:
-        """Builds the prompt for the Yandex Cloud API."""
-        return f"""You are a senior Python code reviewer. Analyze this code diff and respond with a single JSON object.
+_CONFIG = _load_config()
+
+# First ```json fenced object in a model response; non-greedy so a later code block is not swallowed
+_JSON_FENCE_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
+# Decodes a bare object in place, so prose around it (and braces in that prose) can be skipped
+_JSON_DECODER = json.JSONDecoder()
+# A bare object inside prose is only taken as the payload if it has one of these keys;
+# otherwise it is likely a quoted snippet and the section fallback should run
+_ANALYSIS_KEYS = frozenset(("quality_issues", "good_practices", "patterns", "anti_patterns", "overall_score", "analyses"))
+
+# Patterns used by the fallback extraction in _parse_analysis_response
+_QUALITY_RE = re.compile(r"1\.\s*Code quality issues:?\s*\n(.*?)(?=\n\s*2\.|\Z)", re.DOTALL | re.IGNORECASE)
+_PRACTICES_RE = re.compile(r"2\.\s*Good practices:?\s*\n(.*?)(?=\n\s*3\.|\Z)", re.DOTALL | re.IGNORECASE)
+_SCORE_RE = re.compile(r"3\.\s*Overall quality score:?\s*.*?(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10", re.DOTALL | re.IGNORECASE)
+_SECTIONS_RE = re.compile(
+    r"1\.\s*Code quality issues:?\s*\n(?P<issues>.*?)\n\s*2\.\s*Good practices:?\s*\n(?P<practices>.*?)"
+    r"\n\s*3\.\s*Overall quality score:?(?P<score>.*)",
+    re.DOTALL | re.IGNORECASE,
+)
+_SCORE_VALUE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10", re.IGNORECASE)
+_NUMBERED_RE = re.compile(r"^\s*\d+\.\s+(.*)", re.MULTILINE)
+_BULLET_MARKERS = ("-", "•", "*")
+
+# Static instructions of the analysis prompt; the diff is appended after them,
+# which keeps the prompt prefix identical across calls
+_ANALYZE_PROMPT_PREFIX = """You are a senior Python code reviewer. Analyze this code diff and respond with a single JSON object.
 
 1. Code quality issues:
    • List each issue, explain why it's problematic, and reference file:line ranges.
@@ -145,7 +117,7 @@ Final MR score                |                             |        |
 
 Example output:
 ```json
-{{
+{
   "quality_issues": [
     "God Class in models/user.py:1–200 — class handles too many responsibilities",
     "Duplicated data formatting logic in utils.py:50–60 and report.py:120–130"
@@ -162,13 +134,225 @@ Example output:
     "Duplicated Code"
   ],
   "overall_score": 9.3
-}}
+}
 ```
 
 Code diff:
-{diff_content}
 """
 
+# Appended to the prompt when a previous attempt did not return clean JSON
+_STRICT_JSON_SUFFIX = "\n\nIMPORTANT: Output only valid JSON, no extra text."
+
+_SYSTEM_MESSAGE = {"role": "system", "text": "You are a code review expert providing detailed analysis of code changes."}
+
+# Appended after the marked diffs of a batched prompt; {count} is the number of diffs
+_BATCH_INSTRUCTIONS = """
+The code above contains {count} independent diffs, each starting with a ===DIFF N=== marker.
+Analyze every diff separately and respond with a single JSON object of the form
+{{"analyses": [ ... ]}} containing exactly {count} entries in diff order, each with the
+fields shown in the example output above. Output only valid JSON, no extra text.
+"""
+
+# Digest of every instruction sent to the model; changes whenever a prompt is edited,
+# so stored analyses made with an older prompt are not reused
+PROMPT_VERSION = content_digest(
+    "\0".join((_ANALYZE_PROMPT_PREFIX, _STRICT_JSON_SUFFIX, _SYSTEM_MESSAGE["text"], _BATCH_INSTRUCTIONS)).encode("utf-8")
+)[:16]
+
+# Prompts longer than this are truncated before being sent to the model
+MAX_PROMPT_LENGTH = 32000
+_TRUNCATION_MARKER = "\n[... TRUNCATED ...]"
+# Output token budget for a single analysis; batched calls scale it per diff
+ANALYSIS_MAX_TOKENS = 1500
+# Upper bound on the number of diffs packed into one batched API call
+BATCH_MAX_SIZE = 4
+
+# Exact-match cache of successful API responses, shared by all analyzer instances
+RESPONSE_CACHE_MAXSIZE = 512
+RESPONSE_CACHE_TTL_SECONDS = 3600
+_response_cache = LLMCache(MemoryBackend(maxsize=RESPONSE_CACHE_MAXSIZE), ttl_seconds=RESPONSE_CACHE_TTL_SECONDS)
+
+def _empty_result(error: str) -> Dict[str, Any]:
+    """Analysis result with no findings, carrying error as both the raw response and the error."""
+    # Built fresh on every call, callers may mutate the lists
+    return {
+        "quality_issues": [],
+        "good_practices": [],
+        "patterns": [],
+        "anti_patterns": [],
+        "overall_score": None,
+        "raw_response": error,
+        "error": error,
+    }
+
+def _format_file_block(file_info: Any) -> Tuple[str, ...]:
+    """Prompt lines for one 'files' entry of PR data; empty for invalid entries."""
+    if not isinstance(file_info, dict):
+        logger.warning("Skipping invalid file entry in PR data: %s", file_info)
+        return ()
+    filename = file_info.get('filename')
+    patch = file_info.get('patch')
+    if filename and patch:
+        # str.strip returns the same object when there is nothing to strip, so clean patches aren't copied
+        return (f"--- a/{filename}", f"+++ b/{filename}", "```diff", patch.strip('\n'), "```")
+    if filename:
+        logger.warning("File '%s' in PR data has no patch content.", filename)
+        return (f"--- a/{filename}", f"+++ b/{filename}", "(No patch content provided)\n")
+    return ()
+
+def _truncate_prompt(prompt: str) -> str:
+    """Cut prompt to MAX_PROMPT_LENGTH on a line boundary and mark the cut for the model."""
+    limit = MAX_PROMPT_LENGTH - len(_TRUNCATION_MARKER)
+    cut = prompt.rfind("\n", 0, limit)
+    if cut <= 0:
+        cut = limit
+    return prompt[:cut] + _TRUNCATION_MARKER
+
+def _extract_bullets(text: str) -> List[str]:
+    """Collect '-', '*' and '•' list items line by line, without the regex engine."""
+    bullets = []
+    for line in text.splitlines():
+        stripped = line.lstrip()
+        if stripped[:1] in _BULLET_MARKERS and stripped[1:2].isspace():
+            bullets.append(stripped[1:])
+    return bullets
+
+class MergeRequestAnalyzer:
+    """Main class for analyzing merge request quality"""
+    
+    def __init__(
+        self,
+        credentials: Optional[List[Tuple[str, str]]] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        """
+        Args:
+            credentials: (folder_id, api_key) pairs whose quotas requests are spread over
+                         round-robin. Defaults to the pair from the environment.
+            max_concurrency: Maximum number of model requests in flight at once (unbounded if None).
+        """
+        logger.info("Initializing MergeRequestAnalyzer")
+        self._cfg = _CONFIG
+        self._credentials = credentials or [(self._cfg.folder_id, self._cfg.api_key)]
+        # SDK clients are created on the first request, see _get_sdks
+        self._sdks: Optional[List[Any]] = None
+        self._base_models: List[Any] = []
+        self._sdk_indices = cycle(range(len(self._credentials)))
+        self._sdk_lock = threading.Lock()
+        self._configured_models: Dict[Tuple[int, float, int], Any] = {}
+        self._request_slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else nullcontext()
+        self._cache = _response_cache
+        logger.info("Successfully initialized MergeRequestAnalyzer with %d credential set(s)", len(self._credentials))
+    
+    def _get_sdks(self) -> List[Any]:
+        """
+        Create the YCloudML clients of the credential pool on first use.
+        
+        The SDK import pulls in grpc and protobuf, which is slow and not needed
+        by callers that only build prompts or parse responses. Must be called
+        with _sdk_lock held.
+        """
+        if self._sdks is None:
+            from yandex_cloud_ml_sdk import YCloudML
+            
+            sdks = [YCloudML(folder_id=folder_id, auth=api_key) for folder_id, api_key in self._credentials]
+            self._base_models = [sdk.models.completions(self._cfg.model_name, model_version="latest") for sdk in sdks]
+            self._sdks = sdks
+        return self._sdks
+    
+    @property
+    def analysis_version(self) -> str:
+        """Model name and prompt version, for keying analyses stored outside this process."""
+        return f"{self._cfg.model_name}:{PROMPT_VERSION}"
+    
+    @property
+    def sdk(self) -> Any:
+        """The YCloudML client of the first credential set."""
+        with self._sdk_lock:
+            return self._get_sdks()[0]
+    
+    def _get_model(self, temperature: float, max_tokens: int):
+        """Return a completions model configured with the given settings on the next SDK of the pool."""
+        with self._sdk_lock:
+            self._get_sdks()
+            sdk_index = next(self._sdk_indices)
+        settings = (sdk_index, temperature, max_tokens)
+        model = self._configured_models.get(settings)
+        if model is None:
+            model = self._base_models[sdk_index].configure(temperature=temperature, max_tokens=max_tokens)
+            self._configured_models[settings] = model
+        return model
+        
+    def call_yandex_cloud_api(self, prompt: str, temperature: float = 0.2, max_tokens: int = ANALYSIS_MAX_TOKENS) -> Dict[str, Any]:
+        """
+        Call Yandex Cloud API with the given prompt using the SDK
+        
+        Args:
+            prompt: The prompt to send to the API
+            temperature: Temperature parameter for generation (lower = more deterministic)
+            max_tokens: Maximum number of tokens the model may generate
+            
+        Returns:
+            The API response
+        """
+        logger.info("Calling Yandex Cloud API")
+        try:
+            # Credentials are validated once at import time, only the length needs checking here
+            prompt_length = len(prompt)
+            if prompt_length > MAX_PROMPT_LENGTH:
+                prompt = _truncate_prompt(prompt)
+                logger.warning("Prompt truncated from %d to %d chars", prompt_length, len(prompt))
+            
+            cache_key = self._response_cache_key(prompt, temperature, max_tokens)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached Yandex Cloud API response")
+                return cached
+            
+            model = self._get_model(temperature, max_tokens)
+            
+            logger.info("Sending request to model: %s", self._cfg.model_name)
+            with self._request_slots:
+                result = model.run(
+                    [
+                        _SYSTEM_MESSAGE,
+                        {"role": "user", "text": prompt}
+                    ]
+                )
+            
+            # Only the first alternative is used, so don't drain the rest
+            first_alternative = next(iter(result), None)
+            if first_alternative is not None:
+                logger.info("Successfully received response from Yandex Cloud API")
+                response = {"result": {"alternatives": [first_alternative]}}
+                self._cache.set(cache_key, response)
+                return response
+            else:
+                logger.warning("No alternatives returned from the model")
+                return {"error": "No alternatives returned from the model"}
+            
+        except ConnectionError as ce:
+            logger.error("Connection error: %s", ce)
+            return {"error": f"Connection error: {str(ce)}"}
+        except TimeoutError as te:
+            logger.error("API request timed out: %s", te)
+            return {"error": f"API request timed out: {str(te)}"}
+        except Exception as e:
+            logger.error("API request failed: %s", e, exc_info=True)
+            return {"error": f"API request failed: {str(e)}"}
+    
+    def _response_cache_key(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Cache key covering everything that changes the model output; CRLF and LF prompts share a key."""
+        key_source = json.dumps(
+            {"m": self._cfg.model_name, "t": temperature, "n": max_tokens, "p": normalize_prompt(prompt)},
+            sort_keys=True,
+        )
+        return content_digest(key_source.encode("utf-8"))
+    
+    def _build_analysis_prompt(self, diff_content: str) -> str:
+        """Builds the prompt for the Yandex Cloud API."""
+        return "".join((_ANALYZE_PROMPT_PREFIX, diff_content, "\n"))
+
     def analyze_code_changes(self, diff_content: str) -> Dict[str, Any]:
         """
         Analyze code changes provided as a diff string.
@@ -187,32 +371,46 @@ Code diff:
             try:
                 if not diff_content:
                     logger.warning("Diff content is empty, returning empty analysis.")
-                    return {
-                        "quality_issues": [],
-                        "good_practices": [],
-                        "patterns": [],
-                        "anti_patterns": [],
-                        "overall_score": None,
-                        "raw_response": "Input diff content was empty.",
-                        "error": "Input diff content was empty."
-                    }
+                    return _empty_result("Input diff content was empty.")
                 prompt = self._build_analysis_prompt(diff_content)
                 # On retry, add a note to the prompt to output strict JSON
                 if attempt > 0:
-                    prompt = prompt + "\n\nIMPORTANT: Output only valid JSON, no extra text."
+                    prompt = prompt + _STRICT_JSON_SUFFIX
                 response = self.call_yandex_cloud_api(prompt)
                 result = self._parse_analysis_response(response)
                 last_result = result
                 # If fallback was not used, or this is the last attempt, return
                 if not getattr(result, '_used_fallback', False) or attempt == max_attempts - 1:
                     return result
-                logger.warning(f"Retrying analysis due to fallback JSON extraction (attempt {attempt+2})")
+                logger.warning("Retrying analysis due to fallback JSON extraction (attempt %d)", attempt + 2)
             except Exception as e:
-                logger.error(f"Error during code changes analysis: {str(e)}", exc_info=True)
+                logger.error("Error during code changes analysis: %s", e, exc_info=True)
                 return {"error": f"Error during code changes analysis: {str(e)}"}
             attempt += 1
         return last_result
 
+    def _validate_pull_request(self, pr_data: Any) -> Optional[Dict[str, Any]]:
+        """Return an error result if pr_data cannot be analyzed, otherwise None."""
+        if not isinstance(pr_data, dict):
+            logger.error("PR data must be a dictionary")
+            return {"error": "PR data must be a dictionary"}
+        files = pr_data.get('files', [])
+        if not isinstance(files, list):
+            logger.error("'files' must be a list")
+            return {"error": "'files' must be a list"}
+        if not files:
+            logger.warning("No files found in the pull request data, returning empty analysis.")
+            return _empty_result("No files found in PR data.")
+        return None
+
+    def _build_pull_request_diff(self, pr_data: Dict[str, Any]) -> str:
+        """Render validated PR data (title, description, file patches) as diff content for the prompt."""
+        title = pr_data.get('title', 'N/A')
+        description = pr_data.get('description', 'No description provided.')
+        header = (f"# Pull Request: {title}", f"\n## Description\n{description}\n", "## Changes\n")
+        file_lines = chain.from_iterable(map(_format_file_block, pr_data.get('files', [])))
+        return "\n".join(chain(header, file_lines))
+
     def analyze_pull_request(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze a pull request from structured data (title, description, files with patches).
@@ -228,51 +426,19 @@ Code diff:
         max_attempts = 3
         attempt = 0
         last_result = None
+        base_prompt = None
         while attempt < max_attempts:
             try:
-                if not isinstance(pr_data, dict):
-                    logger.error("PR data must be a dictionary")
-                    return {"error": "PR data must be a dictionary"}
-                title = pr_data.get('title', 'N/A')
-                description = pr_data.get('description', 'No description provided.')
-                files = pr_data.get('files', [])
-                if not isinstance(files, list):
-                    logger.error("'files' must be a list")
-                    return {"error": "'files' must be a list"}
-                if not files:
-                    logger.warning("No files found in the pull request data, returning empty analysis.")
-                    return {
-                        "quality_issues": [], "good_practices": [], "patterns": [],
-                        "anti_patterns": [], "overall_score": None,
-                        "raw_response": "No files found in PR data.",
-                        "error": "No files found in PR data."
-                    }
-                diff_parts = []
-                diff_parts.append(f"# Pull Request: {title}")
-                diff_parts.append(f"\n## Description\n{description}\n")
-                diff_parts.append("## Changes\n")
-                for file_info in files:
-                    if not isinstance(file_info, dict):
-                        logger.warning(f"Skipping invalid file entry in PR data: {file_info}")
-                        continue
-                    filename = file_info.get('filename')
-                    patch = file_info.get('patch')
-                    if filename and patch:
-                        diff_parts.append(f"--- a/{filename}")
-                        diff_parts.append(f"+++ b/{filename}")
-                        diff_parts.append("```diff")
-                        diff_parts.append(patch.strip('\n'))
-                        diff_parts.append("```")
-                    elif filename:
-                        logger.warning(f"File '{filename}' in PR data has no patch content.")
-                        diff_parts.append(f"--- a/{filename}")
-                        diff_parts.append(f"+++ b/{filename}")
-                        diff_parts.append("(No patch content provided)\n")
-                diff_content = "\n".join(diff_parts)
-                prompt = self._build_analysis_prompt(diff_content)
+                # The PR data does not change between attempts, so the prompt is built once
+                if base_prompt is None:
+                    error_result = self._validate_pull_request(pr_data)
+                    if error_result is not None:
+                        return error_result
+                    base_prompt = self._build_analysis_prompt(self._build_pull_request_diff(pr_data))
+                prompt = base_prompt
                 # On retry, add a note to the prompt to output strict JSON
                 if attempt > 0:
-                    prompt = prompt + "\n\nIMPORTANT: Output only valid JSON, no extra text."
+                    prompt = prompt + _STRICT_JSON_SUFFIX
                 response = self.call_yandex_cloud_api(prompt)
                 result = self._parse_analysis_response(response)
                 # Add PR URL if available
@@ -282,48 +448,205 @@ Code diff:
                 # If fallback was not used, or this is the last attempt, return
                 if not getattr(result, '_used_fallback', False) or attempt == max_attempts - 1:
                     return result
-                logger.warning(f"Retrying analysis due to fallback JSON extraction (attempt {attempt+2})")
+                logger.warning("Retrying analysis due to fallback JSON extraction (attempt %d)", attempt + 2)
             except Exception as e:
-                logger.error(f"Error analyzing pull request: {str(e)}", exc_info=True)
+                logger.error("Error analyzing pull request: %s", e, exc_info=True)
                 return {"error": f"Error analyzing pull request: {str(e)}"}
             attempt += 1
         return last_result
     
+    async def acall_yandex_cloud_api(self, prompt: str, temperature: float = 0.2, max_tokens: int = ANALYSIS_MAX_TOKENS) -> Dict[str, Any]:
+        """
+        Async variant of call_yandex_cloud_api for use from an event loop.
+        
+        The blocking SDK call runs in a worker thread, so the loop keeps serving
+        other requests; caching and the max_concurrency limit apply as usual.
+        """
+        return await asyncio.to_thread(self.call_yandex_cloud_api, prompt, temperature, max_tokens)
+    
+    async def aanalyze_pull_request(self, pr_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of analyze_pull_request.
+        
+        Many pull requests can be analyzed concurrently with asyncio.gather;
+        construct the analyzer with max_concurrency to stay within API rate limits.
+        """
+        return await asyncio.to_thread(self.analyze_pull_request, pr_data)
+    
+    def _alternative_text(self, alternative: Any) -> str:
+        """Extract the generated text from a single model alternative."""
+        if isinstance(alternative, dict):
+            if 'message' in alternative and isinstance(alternative['message'], dict) and 'text' in alternative['message']:
+                return alternative['message']['text']
+            if 'text' in alternative:
+                return alternative['text']
+            message = str(alternative)
+            logger.warning("Unexpected dictionary structure in alternative: %s...", message[:100])
+            return message
+        if hasattr(alternative, 'text'):
+            return alternative.text
+        message = str(alternative)
+        logger.warning("Unexpected alternative type: %s. Content: %s...", type(alternative), message[:100])
+        return message
+
+    def _load_json(self, message: str) -> Any:
+        """Parse the JSON payload of a model message, accepting bare or ```json fenced output."""
+        json_match = _JSON_FENCE_RE.search(message)
+        if json_match:
+            try:
+                parsed_json = json_codec.loads(json_match.group(1))
+                logger.info("Successfully parsed API response as JSON.")
+                return parsed_json
+            except json.JSONDecodeError as json_err:
+                logger.warning("Failed to parse fenced JSON block: %s. Trying bare JSON.", json_err)
+
+        # Bare object: the whole reply, or an object in surrounding prose that carries
+        # analysis fields; decoding from each '{' in turn skips stray braces (e.g. "{}")
+        stripped = message.strip()
+        start = message.find("{")
+        while start != -1:
+            try:
+                parsed_json, end = _JSON_DECODER.raw_decode(message, start)
+            except json.JSONDecodeError:
+                parsed_json = None
+            if isinstance(parsed_json, dict) and (
+                not _ANALYSIS_KEYS.isdisjoint(parsed_json) or message[start:end] == stripped
+            ):
+                logger.info("Successfully parsed API response as JSON.")
+                return parsed_json
+            start = message.find("{", start + 1)
+
+        logger.warning("Could not find a JSON object in the API response.")
+        return None
+
+    def _apply_parsed_json(self, analysis: Dict[str, Any], parsed_json: Dict[str, Any]) -> None:
+        """Copy the analysis fields from a parsed JSON object into analysis, normalizing types."""
+        analysis["quality_issues"] = parsed_json.get("quality_issues", [])
+        analysis["good_practices"] = parsed_json.get("good_practices", [])
+        analysis["patterns"] = parsed_json.get("patterns", [])
+        analysis["anti_patterns"] = parsed_json.get("anti_patterns", [])
+        score_val = parsed_json.get("overall_score")
+        if score_val is not None:
+            try:
+                analysis["overall_score"] = float(score_val)
+            except (ValueError, TypeError):
+                logger.warning("Could not convert overall_score '%s' to float.", score_val)
+                analysis["overall_score"] = None
+        for key in ["quality_issues", "good_practices", "patterns", "anti_patterns"]:
+            if not isinstance(analysis[key], list):
+                logger.warning("Field '%s' in parsed JSON is not a list, resetting to empty list.", key)
+                analysis[key] = []
+
+    def _build_batch_analysis_prompt(self, diffs: List[str]) -> str:
+        """Builds one prompt asking for a separate analysis of each diff."""
+        marked_diffs = "\n\n".join(f"===DIFF {i}===\n{diff}" for i, diff in enumerate(diffs, start=1))
+        return self._build_analysis_prompt(marked_diffs) + _BATCH_INSTRUCTIONS.format(count=len(diffs))
+
+    def _parse_batch_response(self, response: Dict[str, Any], expected: int) -> Optional[List[Dict[str, Any]]]:
+        """Split a batched API response into per-diff analyses, or return None if it is unusable."""
+        if "error" in response:
+            logger.warning("Batched API call failed: %s", response['error'])
+            return None
+        alternatives = response.get("result", {}).get("alternatives", [])
+        if not alternatives:
+            logger.warning("Batched API response contained no alternatives.")
+            return None
+        parsed_json = self._load_json(self._alternative_text(alternatives[0]))
+        items = parsed_json.get("analyses") if isinstance(parsed_json, dict) else None
+        if not isinstance(items, list) or len(items) != expected or not all(isinstance(item, dict) for item in items):
+            logger.warning("Batched API response did not contain %d analyses.", expected)
+            return None
+        results = []
+        for item in items:
+            analysis = {
+                "quality_issues": [],
+                "good_practices": [],
+                "patterns": [],
+                "anti_patterns": [],
+                "overall_score": None,
+                "raw_response": json.dumps(item, ensure_ascii=False)
+            }
+            self._apply_parsed_json(analysis, item)
+            results.append(analysis)
+        return results
+
+    def analyze_code_changes_batch(self, diffs: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze several diffs with a single API call, amortizing the instructions across them.
+        
+        Falls back to one analyze_code_changes call per diff when the combined prompt
+        would be truncated or the batched response cannot be split into per-diff results.
+        More than BATCH_MAX_SIZE diffs are split into consecutive batches, one API call
+        each, so the output token budget of a call stays bounded.
+        
+        Args:
+            diffs: Diff contents to analyze
+            
+        Returns:
+            Analysis results in the same order as diffs
+        """
+        if len(diffs) > BATCH_MAX_SIZE:
+            return [
+                analysis
+                for start in range(0, len(diffs), BATCH_MAX_SIZE)
+                for analysis in self.analyze_code_changes_batch(diffs[start:start + BATCH_MAX_SIZE])
+            ]
+        if len(diffs) < 2 or not all(diffs):
+            return [self.analyze_code_changes(diff) for diff in diffs]
+        logger.info("Starting batched analysis of %d diffs", len(diffs))
+        prompt = self._build_batch_analysis_prompt(diffs)
+        if len(prompt) > MAX_PROMPT_LENGTH:
+            logger.info("Batched prompt exceeds the prompt limit, analyzing diffs one by one.")
+            return [self.analyze_code_changes(diff) for diff in diffs]
+        try:
+            response = self.call_yandex_cloud_api(prompt, max_tokens=ANALYSIS_MAX_TOKENS * len(diffs))
+            results = self._parse_batch_response(response, len(diffs))
+        except Exception as e:
+            logger.error("Error during batched analysis: %s", e, exc_info=True)
+            results = None
+        if results is None:
+            logger.warning("Falling back to analyzing diffs one by one.")
+            return [self.analyze_code_changes(diff) for diff in diffs]
+        return results
+
+    def analyze_pull_requests_batch(self, pr_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analyze several pull requests, packing the valid ones into batched API calls
+        of at most BATCH_MAX_SIZE pull requests.
+        
+        Args:
+            pr_data_list: PR dictionaries in the format accepted by analyze_pull_request.
+            
+        Returns:
+            Analysis results in the same order as pr_data_list
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pr_data_list)
+        batch_indices = []
+        diffs = []
+        for i, pr_data in enumerate(pr_data_list):
+            error_result = self._validate_pull_request(pr_data)
+            if error_result is not None:
+                results[i] = error_result
+                continue
+            batch_indices.append(i)
+            diffs.append(self._build_pull_request_diff(pr_data))
+        for i, analysis in zip(batch_indices, self.analyze_code_changes_batch(diffs)):
+            if 'url' in pr_data_list[i]:
+                analysis['pr_url'] = pr_data_list[i]['url']
+            results[i] = analysis
+        return results
+
     def _parse_analysis_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """Parse and structure the API response, handling JSON and fallbacks."""
         if "error" in response:
-            logger.error(f"API call failed: {response['error']}")
-            return {
-                "quality_issues": [], "good_practices": [], "patterns": [],
-                "anti_patterns": [], "overall_score": None,
-                "raw_response": f"API Error: {response['error']}",
-                "error": f"API Error: {response['error']}"
-            }
-        message = ""
+            logger.error("API call failed: %s", response['error'])
+            return _empty_result(f"API Error: {response['error']}")
         raw_api_response_data = response.get("result", {}).get("alternatives", [])
         if raw_api_response_data:
-            first_alt = raw_api_response_data[0]
-            if isinstance(first_alt, dict):
-                if 'message' in first_alt and isinstance(first_alt['message'], dict) and 'text' in first_alt['message']:
-                    message = first_alt['message']['text']
-                elif 'text' in first_alt:
-                    message = first_alt['text']
-                else:
-                    message = str(first_alt)
-                    logger.warning(f"Unexpected dictionary structure in alternative: {message[:100]}...")
-            elif hasattr(first_alt, 'text'):
-                message = first_alt.text
-            else:
-                message = str(first_alt)
-                logger.warning(f"Unexpected alternative type: {type(first_alt)}. Content: {message[:100]}...")
+            message = self._alternative_text(raw_api_response_data[0])
         else:
             logger.warning("API response contained no alternatives.")
-            return {
-                "quality_issues": [], "good_practices": [], "patterns": [],
-                "anti_patterns": [], "overall_score": None,
-                "raw_response": "API response contained no alternatives.",
-                "error": "API response contained no alternatives."
-            }
+            return _empty_result("API response contained no alternatives.")
         analysis = {
             "quality_issues": [],
             "good_practices": [],
@@ -332,77 +655,46 @@ Code diff:
             "overall_score": None,
             "raw_response": message
         }
-        parsed_json = None
-        try:
-            cleaned_message = message.strip()
-            if cleaned_message.startswith("```json"):
-                cleaned_message = cleaned_message[7:]
-                if cleaned_message.endswith("```"):
-                    cleaned_message = cleaned_message[:-3]
-                cleaned_message = cleaned_message.strip()
-            if cleaned_message.startswith('{') and cleaned_message.endswith('}'):
-                parsed_json = json.loads(cleaned_message)
-                logger.info("Successfully parsed cleaned API response as JSON.")
-            else:
-                logger.warning("Cleaned message does not appear to be a JSON object. Trying regex.")
-        except json.JSONDecodeError as json_err:
-            logger.warning(f"Failed to parse cleaned response directly as JSON: {json_err}. Trying regex extraction.")
-            parsed_json = None
-        if parsed_json is None:
-            json_match = re.search(r"```json\s*(\{.*?\})\s*```", message, re.DOTALL)
-            if json_match:
-                json_block = json_match.group(1)
-                try:
-                    parsed_json = json.loads(json_block)
-                    logger.info("Successfully parsed JSON block extracted via regex.")
-                except json.JSONDecodeError as inner_json_err:
-                    logger.warning(f"Failed to parse extracted JSON block: {inner_json_err}. Proceeding without parsed JSON.")
-                    parsed_json = None
-            else:
-                logger.warning("Could not find JSON block via regex.")
+        parsed_json = self._load_json(message)
         if parsed_json is not None and isinstance(parsed_json, dict):
-            analysis["quality_issues"] = parsed_json.get("quality_issues", [])
-            analysis["good_practices"] = parsed_json.get("good_practices", [])
-            analysis["patterns"] = parsed_json.get("patterns", [])
-            analysis["anti_patterns"] = parsed_json.get("anti_patterns", [])
-            score_val = parsed_json.get("overall_score")
-            if score_val is not None:
-                try:
-                    analysis["overall_score"] = float(score_val)
-                except (ValueError, TypeError):
-                    logger.warning(f"Could not convert overall_score '{score_val}' to float.")
-                    analysis["overall_score"] = None
-            for key in ["quality_issues", "good_practices", "patterns", "anti_patterns"]:
-                if not isinstance(analysis[key], list):
-                    logger.warning(f"Field '{key}' in parsed JSON is not a list, resetting to empty list.")
-                    analysis[key] = []
+            self._apply_parsed_json(analysis, parsed_json)
         else:
             logger.warning("JSON parsing failed. Falling back to less reliable regex extraction for analysis fields.")
             analysis['_used_fallback'] = True
-            quality_match = re.search(r"1\.\s*Code quality issues:?\s*\n(.*?)(?=\n\s*2\.|\Z)", message, re.DOTALL | re.IGNORECASE)
-            if quality_match:
-                quality_text = quality_match.group(1).strip()
-                issues = re.findall(r"^\s*[-•*]\s+(.*)", quality_text, re.MULTILINE)
-                if not issues: issues = re.findall(r"^\s*\d+\.\s+(.*)", quality_text, re.MULTILINE)
+            # One pass when all three sections are present, per-section scans otherwise
+            sections_match = _SECTIONS_RE.search(message)
+            if sections_match:
+                quality_text = sections_match.group("issues")
+                practices_text = sections_match.group("practices")
+                score_match = _SCORE_VALUE_RE.search(sections_match.group("score"))
+            else:
+                quality_match = _QUALITY_RE.search(message)
+                quality_text = quality_match.group(1) if quality_match else None
+                practices_match = _PRACTICES_RE.search(message)
+                practices_text = practices_match.group(1) if practices_match else None
+                score_match = _SCORE_RE.search(message)
+            if quality_text is not None:
+                quality_text = quality_text.strip()
+                issues = _extract_bullets(quality_text) or _NUMBERED_RE.findall(quality_text)
                 analysis["quality_issues"] = [issue.strip() for issue in issues if issue.strip()]
-            practices_match = re.search(r"2\.\s*Good practices:?\s*\n(.*?)(?=\n\s*3\.|\Z)", message, re.DOTALL | re.IGNORECASE)
-            if practices_match:
-                practices_text = practices_match.group(1).strip()
-                practices = re.findall(r"^\s*[-•*]\s+(.*)", practices_text, re.MULTILINE)
-                if not practices: practices = re.findall(r"^\s*\d+\.\s+(.*)", practices_text, re.MULTILINE)
+            if practices_text is not None:
+                practices_text = practices_text.strip()
+                practices = _extract_bullets(practices_text) or _NUMBERED_RE.findall(practices_text)
                 analysis["good_practices"] = [practice.strip() for practice in practices if practice.strip()]
-            score_match = re.search(r"3\.\s*Overall quality score:?\s*.*?(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10", message, re.DOTALL | re.IGNORECASE)
             if score_match:
                 try:
                     analysis["overall_score"] = float(score_match.group(1))
                 except ValueError:
-                    logger.warning(f"Could not parse score from regex match: {score_match.group(1)}")
+                    logger.warning("Could not parse score from regex match: %s", score_match.group(1))
                     analysis["overall_score"] = None
             logger.warning("Fallback regex extraction completed. Patterns and anti-patterns might be missing or inaccurate.")
         return analysis
 
 if __name__ == "__main__":
     import argparse
+    import mmap
+    import stat
+    import sys
     
     logger.info("Starting merge request analyzer (direct execution)")
     
@@ -420,46 +712,57 @@ if __name__ == "__main__":
         
         if args.pr:
             try:
-                with open(args.pr, 'r', encoding='utf-8') as f:
-                    pr_data = json.load(f)
-                logger.info(f"Analyzing pull request from: {args.pr}")
+                with open(args.pr, 'rb') as f:
+                    pr_data = json_codec.loads(f.read())
+                logger.info("Analyzing pull request from: %s", args.pr)
                 analysis = analyzer.analyze_pull_request(pr_data)
             except FileNotFoundError:
-                logger.error(f"Error: Input PR JSON file '{args.pr}' not found.")
+                logger.error("Error: Input PR JSON file '%s' not found.", args.pr)
                 analysis = {"error": f"File not found: {args.pr}"}
             except json.JSONDecodeError:
-                logger.error(f"Error: Could not decode JSON from '{args.pr}'.")
+                logger.error("Error: Could not decode JSON from '%s'.", args.pr)
                 analysis = {"error": f"Invalid JSON in file: {args.pr}"}
         
         elif args.diff:
             try:
-                with open(args.diff, 'r', encoding='utf-8') as f:
-                    diff_content = f.read()
-                logger.info(f"Analyzing diff file: {args.diff}")
+                # The prompt is cut to MAX_PROMPT_LENGTH chars anyway, so map the file and
+                # decode only the bytes that can reach it (UTF-8 needs at most 4 per char)
+                with open(args.diff, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    if stat.S_ISREG(st.st_mode) and st.st_size > 0:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            raw_diff = mm[:MAX_PROMPT_LENGTH * 4]
+                    else:
+                        # Pipes, /dev/stdin and process substitution report size 0 but
+                        # have data, and cannot be mapped; an empty regular file reads as b""
+                        raw_diff = f.read(MAX_PROMPT_LENGTH * 4)
+                    diff_content = raw_diff.decode('utf-8', errors='replace')
+                diff_content = diff_content.replace('\r\n', '\n')
+                logger.info("Analyzing diff file: %s", args.diff)
                 analysis = analyzer.analyze_code_changes(diff_content)
             except FileNotFoundError:
-                logger.error(f"Error: Input diff file '{args.diff}' not found.")
+                logger.error("Error: Input diff file '%s' not found.", args.diff)
                 analysis = {"error": f"File not found: {args.diff}"}
         
-        output_json = json.dumps(analysis, indent=2)
         if args.output:
             try:
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    f.write(output_json)
-                logger.info(f"Analysis results saved to: {args.output}")
+                with open(args.output, 'wb') as f:
+                    json_codec.dump(analysis, f)
+                logger.info("Analysis results saved to: %s", args.output)
             except IOError as e:
-                logger.error(f"Error writing output file '{args.output}': {e}")
+                logger.error("Error writing output file '%s': %s", args.output, e)
                 print("\n--- Analysis Results (stdout due to file error) ---")
-                print(output_json)
+                print(json_codec.dumps(analysis))
                 print("----------------------------------------------------\n")
         
         else:
-            print(output_json)
+            json_codec.dump(analysis, sys.stdout.buffer)
+            sys.stdout.buffer.write(b"\n")
         
         if "error" not in analysis:
             logger.info("Analysis completed successfully.")
         else:
-            logger.warning(f"Analysis completed with an error: {analysis.get('error')}")
+            logger.warning("Analysis completed with an error: %s", analysis.get('error'))
         
     except Exception as e:
-        logger.critical(f"A critical error occurred during direct execution: {str(e)}", exc_info=True)
\ No newline at end of file
+        logger.critical("A critical error occurred during direct execution: %s", e, exc_info=True)
\ No newline at end of file
@@ -1,44 +1,207 @@
 # Check notebooks/gh_fetcher_example.ipynb
 
-from github import Github, Auth
-from github.Issue import Issue
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 
+from app.modules.llm_cache import CacheBackend, MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_URL}/graphql"
+# Largest per_page GitHub's REST list endpoints accept; fewer pages means fewer round-trips
+MAX_PAGE_SIZE = 100
+# Pull requests fetched per aliased GraphQL query
+GRAPHQL_BATCH_SIZE = 20
+# Times a request is retried after a primary or secondary rate limit before giving up
+RATE_LIMIT_RETRIES = 3
+# Wait used when a rate-limited response says nothing about when to retry,
+# as GitHub recommends for secondary rate limits
+RATE_LIMIT_DEFAULT_WAIT = 60
+
+# Everything _prep_pull needs except patches, which GraphQL does not expose
+_GQL_PR_FRAGMENT = """
+fragment PrFields on PullRequest {
+  title
+  body
+  commits(first: 100) { pageInfo { hasNextPage } nodes { commit { message } } }
+  reviews(first: 100) {
+    pageInfo { hasNextPage }
+    nodes { comments(first: 100) { pageInfo { hasNextPage } nodes { bodyText } } }
+  }
+}
+"""
+
+
+def _rate_limit_wait(response: requests.Response) -> Optional[float]:
+    """Seconds to wait before retrying a rate-limited response, or None if it was not rate limited."""
+    if response.status_code not in (403, 429):
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        return max(float(retry_after), 1.0)
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset = response.headers.get("X-RateLimit-Reset")
+        if reset is not None:
+            return max(float(reset) - time.time(), 1.0)
+        return RATE_LIMIT_DEFAULT_WAIT
+    # A 403 without rate-limit headers is a permission error, not worth retrying
+    return RATE_LIMIT_DEFAULT_WAIT if response.status_code == 429 else None
+
+
+def _graphql_pr_query(pr_numbers: List[int]) -> str:
+    """One query returning every PR in pr_numbers, aliased pr0, pr1, ... in order."""
+    aliases = "\n".join(
+        f"    pr{i}: pullRequest(number: {number}) {{ ...PrFields }}"
+        for i, number in enumerate(pr_numbers)
+    )
+    return (
+        "query($owner: String!, $name: String!) {\n"
+        "  repository(owner: $owner, name: $name) {\n"
+        f"{aliases}\n"
+        "  }\n"
+        "}\n"
+        f"{_GQL_PR_FRAGMENT}"
+    )
+
 
 class GithubFetcher:
     _github_token: str
     _repo_name: str
+    _max_workers: int
+    _page_size: int
 
-    _auth: Auth
-    _g: Github
+    _session: requests.Session
+    # Search page URL -> (ETag, PR numbers on the page, next page URL); pass a
+    # persistent or shared backend so the entries outlive this fetcher
+    _etag_cache: CacheBackend
 
     def __init__(
         self,
         repo_name: str,
         github_token: str,
+        max_workers: int = 8,
+        page_size: int = MAX_PAGE_SIZE,
+        etag_cache: Optional[CacheBackend] = None,
     ):
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
         self._repo_name = repo_name
         self._github_token = github_token
+        self._max_workers = max_workers
+        self._page_size = page_size
+
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self._github_token}",
+        })
+        # Back off on transient server errors; the GraphQL endpoint is a POST.
+        # Rate limits (403/429) are handled in _request, which can read GitHub's reset headers.
+        # One pooled keep-alive connection per worker, so concurrent requests reuse
+        # TLS connections instead of overflowing the default pool of 10 and reconnecting.
+        retries = Retry(total=3, backoff_factor=1, status_forcelist=(502, 503, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self._max_workers, 1), max_retries=retries)
+        self._session.mount("https://", adapter)
+        self._etag_cache = MemoryBackend() if etag_cache is None else etag_cache
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        # Sleep out primary and secondary rate limits instead of failing the whole export
+        response = self._session.request(method, url, **kwargs)
+        for _ in range(RATE_LIMIT_RETRIES):
+            wait = _rate_limit_wait(response)
+            if wait is None:
+                break
+            logger.warning("GitHub rate limit hit (HTTP %d), retrying in %.0f s", response.status_code, wait)
+            time.sleep(wait)
+            response = self._session.request(method, url, **kwargs)
+        return response
 
-        self._authorize()
+    def _search_pr_numbers(self, query: str) -> List[int]:
+        # Conditional GET per result page: a 304 is free of rate-limit quota
+        # and reuses the numbers cached for that page by an earlier call
+        numbers = []
+        url = f"{GITHUB_API_URL}/search/issues?{urlencode({'q': query, 'per_page': self._page_size})}"
+        while url:
+            cached = self._etag_cache.get(url)
+            headers = {"If-None-Match": cached[0]} if cached else {}
+            response = self._request("GET", url, headers=headers)
+
+            if response.status_code == 304 and cached:
+                _, page_numbers, next_url = cached
+            else:
+                response.raise_for_status()
+                page_numbers = [item["number"] for item in response.json()["items"]]
+                next_url = response.links.get("next", {}).get("url")
+                etag = response.headers.get("ETag")
+                if etag:
+                    self._etag_cache.set(url, (etag, page_numbers, next_url))
+
+            numbers.extend(page_numbers)
+            url = next_url
+        return numbers
+
+    def _pull_details(self, pr_numbers: List[int]) -> List[Dict[str, Any]]:
+        # Title, body, commits and review comments of several PRs in a single round-trip
+        owner, name = self._repo_name.split("/", 1)
+        response = self._request(
+            "POST",
+            GITHUB_GRAPHQL_URL,
+            json={"query": _graphql_pr_query(pr_numbers), "variables": {"owner": owner, "name": name}},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"GitHub GraphQL query failed: {payload['errors']}")
 
-        self._g = Github(auth=self._auth)
+        repository = payload["data"]["repository"]
+        return [repository[f"pr{i}"] for i in range(len(pr_numbers))]
 
-    def _authorize(self):
-        self._auth = Auth.Token(self._github_token)
+    def _pull_files(self, pr_number: int) -> List[Dict[str, Any]]:
+        # Patches are only available from the REST files endpoint
+        files = []
+        url = f"{GITHUB_API_URL}/repos/{self._repo_name}/pulls/{pr_number}/files?per_page={self._page_size}"
+        while url:
+            response = self._request("GET", url)
+            response.raise_for_status()
+            files.extend({"filename": f["filename"], "patch": f.get("patch")} for f in response.json())
+            url = response.links.get("next", {}).get("url")
+        return files
 
-    def _prep_issue(self, issue: Issue):
-        pr_number = issue.number
-        pull = self._g.get_repo(self._repo_name).get_pull(pr_number)
-        files = pull.get_files()
+    def _prep_pull(self, pr_number: int, details: Dict[str, Any], files: List[Dict[str, Any]]):
+        # The nested connections are not paginated; say so when GitHub had more than it returned
+        truncated = [
+            name
+            for name, connection in chain(
+                (("commits", details["commits"]), ("reviews", details["reviews"])),
+                (("review comments", review["comments"]) for review in details["reviews"]["nodes"]),
+            )
+            if connection["pageInfo"]["hasNextPage"]
+        ]
+        if truncated:
+            logger.warning("PR #%d: only the first 100 %s were fetched", pr_number, " / ".join(dict.fromkeys(truncated)))
 
         return {
-            "title": pull.title,
-            "description": pull.body,
-            "files": [{"filename": f.filename, "patch": f.patch} for f in files],
-            "commits_messages": [c.commit.message for c in pull.get_commits()],
-            "comments": [c.body_text for c in pull.get_comments()],
-            "url": pull.url, # Optional
+            "title": details["title"],
+            "description": details["body"] or None,
+            "files": files,
+            "commits_messages": [c["commit"]["message"] for c in details["commits"]["nodes"]],
+            "comments": [
+                c["bodyText"]
+                for review in details["reviews"]["nodes"]
+                for c in review["comments"]["nodes"]
+            ],
+            "url": f"{GITHUB_API_URL}/repos/{self._repo_name}/pulls/{pr_number}", # Optional
         }
 
     def export_pr_data(self, username: str, start_date: datetime, end_date: datetime):
@@ -47,6 +210,16 @@ class GithubFetcher:
             f"closed:{start_date.isoformat()}..{end_date.isoformat()}"
         )
 
-        issues = self._g.search_issues(query)
+        pr_numbers = self._search_pr_numbers(query)
+        if not pr_numbers:
+            return []
 
-        return [self._prep_issue(i) for i in issues]
+        batches = [
+            pr_numbers[i:i + GRAPHQL_BATCH_SIZE]
+            for i in range(0, len(pr_numbers), GRAPHQL_BATCH_SIZE)
+        ]
+        # One GraphQL query per batch plus one files request per PR, all in flight together
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(pr_numbers))) as executor:
+            files = executor.map(self._pull_files, pr_numbers)
+            details = chain.from_iterable(executor.map(self._pull_details, batches))
+            return list(map(self._prep_pull, pr_numbers, details, files))
@@ -0,0 +1,114 @@
+import io
+import json
+from typing import Any, BinaryIO, Iterator, TextIO, Union
+
+# orjson is an optional speedup; everything falls back to the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can catch this either way
+JSONDecodeError = json.JSONDecodeError
+
+# Characters read per refill by iter_array
+STREAM_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class NotAnArrayError(ValueError):
+    """Raised by iter_array when the document does not start with a JSON array."""
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Deserialize a JSON document."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Serialize obj as JSON indented by two spaces."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
+
+
+def dump(obj: Any, fp: BinaryIO) -> None:
+    """Serialize obj as JSON indented by two spaces straight into a binary file object."""
+    if orjson is not None:
+        fp.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    # json.dump writes chunk by chunk, so the whole document is never held as one string
+    writer = io.TextIOWrapper(fp, encoding="utf-8")
+    try:
+        json.dump(obj, writer, indent=2)
+        writer.flush()
+    finally:
+        writer.detach()
+
+
+def iter_array(fp: TextIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array from a text file object one at a time.
+
+    Only the element being decoded and one read chunk are held in memory, so
+    callers can start on the first element before the rest of the file is read.
+    Raises NotAnArrayError if the document is not an array and JSONDecodeError
+    if it is malformed.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    # start -> first element or ']' -> (',' -> element)* -> ']'
+    state = "start"
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                raise JSONDecodeError("Unterminated JSON array", buf, pos)
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf, pos = chunk, 0
+            continue
+
+        char = buf[pos]
+        if state == "start":
+            if char != "[":
+                raise NotAnArrayError("JSON document is not an array")
+            pos += 1
+            state = "first"
+        elif char == "]" and state in ("first", "separator"):
+            rest = buf[pos + 1:] + fp.read()
+            if rest.strip(_WHITESPACE):
+                raise JSONDecodeError("Extra data", rest, len(rest) - len(rest.lstrip(_WHITESPACE)))
+            return
+        elif state == "separator":
+            if char != ",":
+                raise JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            pos += 1
+            state = "element"
+        else:
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+                # A number cut by the buffer end decodes as a shorter number: check that
+                # the next character cannot continue it before trusting the element
+                incomplete = not eof and (end == len(buf) or buf[end] in _NUMBER_CHARS)
+            except JSONDecodeError:
+                if eof:
+                    raise
+                incomplete = True
+            if incomplete:
+                # Grow the read geometrically so an element spanning many chunks is
+                # re-scanned O(log n) times rather than once per chunk
+                chunk = fp.read(max(chunk_size, len(buf) - pos))
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield element
+            pos = end
+            state = "separator"
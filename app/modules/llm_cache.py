@@ -0,0 +1,175 @@
+import hashlib
+import os
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Protocol
+
+# fcntl is POSIX-only; without it ShelveBackend cannot lock out other processes
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# blake3 is an optional speedup for hashing large prompts and PR payloads;
+# without it keys fall back to hashlib.sha256
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a prompt for cache keys.
+
+    Only CRLF line endings are folded into LF. Trailing whitespace and blank
+    lines are part of what the review judges (PEP 8), so prompts differing in
+    them must not share an entry.
+    """
+    return prompt.replace("\r\n", "\n")
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Hex digest of data for use as a cache key.
+
+    Keys only need to be collision resistant, not portable, so the digest
+    differs depending on whether blake3 is installed; a change is just a cache miss.
+    """
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+
+class CacheBackend(Protocol):
+    """Key-value storage used by LLMCache (in-memory, Redis, ...)."""
+
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU storage."""
+
+    _maxsize: int
+    _data: "OrderedDict[str, Any]"
+    _lock: threading.Lock
+
+    def __init__(self, maxsize: int = 512):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class ShelveBackend:
+    """
+    Thread-safe persistent storage in a shelve file, shared across runs.
+
+    The dbm module behind shelve may be dbm.dumb, which does no locking of its
+    own, so the shelf is guarded by an exclusive lock on "<path>.lock" for as
+    long as it is open. Opening it while another process holds the lock raises
+    BlockingIOError instead of letting two writers corrupt the file.
+    """
+
+    _shelf: shelve.Shelf
+    _lock: threading.Lock
+    _lock_file: Optional[Any]
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock_file = None
+        if fcntl is not None:
+            lock_file = open(f"{path}.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise
+            self._lock_file = lock_file
+        try:
+            self._shelf = shelve.open(path)
+        except Exception:
+            self._release_lock_file()
+            raise
+        self._lock = threading.Lock()
+
+    def _release_lock_file(self) -> None:
+        if self._lock_file is not None:
+            # Closing the descriptor drops the flock
+            self._lock_file.close()
+            self._lock_file = None
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._shelf.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._shelf[key] = value
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._shelf.pop(key, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._shelf.close()
+            self._release_lock_file()
+
+
+class LLMCache:
+    """Response cache with an optional time-to-live on top of a CacheBackend."""
+
+    _backend: CacheBackend
+    _ttl_seconds: Optional[float]
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: Optional[float] = None):
+        self._backend = backend
+        self._ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._backend.get(key)
+        if entry is None:
+            return None
+
+        # Wall-clock expiry, so entries stay meaningful in backends shared across processes
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.time():
+            self._backend.delete(key)
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = None if self._ttl_seconds is None else time.time() + self._ttl_seconds
+        self._backend.set(key, (expires_at, value))
+
+    def close(self) -> None:
+        """Release the backend's resources, for backends that hold a file or connection."""
+        close = getattr(self._backend, "close", None)
+        if close is not None:
+            close()
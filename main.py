@@ -1,21 +1,31 @@
+from __future__ import annotations
+
 import argparse
+import io
 import json
 import sys
 import os
-import re # Added for parse_repository_file
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from dotenv import load_dotenv
-from typing import Dict, List, Any # Added for type hints
+from functools import partial
+from typing import TYPE_CHECKING, Dict, List, Any, Callable, Iterable, Iterator, Optional, TextIO # Added for type hints
 
 # Assuming analyzer and gh_fetcher are importable
 # Adjust paths if necessary based on your project structure
+# Only stdlib-backed modules here: the analyzer (dotenv, Yandex SDK) and gh_fetcher
+# (requests) are imported in main() once the arguments are known to be valid
 try:
-    from app.modules.analyzer import MergeRequestAnalyzer
-    from app.modules.gh_fetcher import GithubFetcher
+    from app.modules.llm_cache import LLMCache, ShelveBackend, content_digest
+    from app.modules import json_codec
+    from repository_parser import parse_repository_file
 except ImportError as e:
     print(f"Error importing modules: {e}. Make sure the paths are correct.")
     sys.exit(1)
 
+if TYPE_CHECKING:
+    from app.modules.analyzer import MergeRequestAnalyzer
+
 # Configure logging (optional, can reuse from analyzer or set up anew)
 import logging
 logging.basicConfig(
@@ -25,11 +35,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables for GitHub Fetcher and Analyzer
-load_dotenv()
-
 # --- Environment Variable Checks ---
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# Environment variables are loaded from .env in main(), so read GITHUB_TOKEN after that
 # REPO_NAME = os.getenv("GITHUB_REPO_NAME") # Assuming you'll add this to .env for repo name - REMOVED
 
 # Analyzer needs these, but they are checked within its __init__
@@ -37,71 +44,23 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 # YANDEX_CLOUD_FOLDER_ID = os.getenv("YANDEX_CLOUD_FOLDER_ID")
 # YANDEX_CLOUD_MODEL_NAME = os.getenv("YANDEX_CLOUD_MODEL_NAME")
 
-# --- Input Parsing Functions (moved from analyzer.py) ---
-
-def parse_repository_file(file_path: str) -> Dict[str, str]:
-    """
-    Parse a repository file in the yeongpin-cursor-free-vip.txt format.
-
-    Args:
-        file_path: Path to the repository file
-
-    Returns:
-        Dictionary mapping file paths to their content
-    """
-    logger.info(f"Parsing repository file: {file_path}")
-    try:
-        # Check if file exists
-        if not os.path.isfile(file_path):
-            logger.error(f"Repository file does not exist: {file_path}")
-            raise FileNotFoundError(f"Repository file does not exist: {file_path}")
-
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            content = f.read()
-
-        if not content:
-            logger.warning("Repository file is empty")
-            return {}
-
-        # Simple parsing logic based on the original function
-        # Assumes format: FILE: path\ncontent\n================================================
-        repository_files = {}
-        file_delimiter = "\n================================================\n"
-        # Split using a more robust delimiter that includes newline
-        sections = content.split(file_delimiter)
-
-        for section in sections:
-            if not section.strip():
-                continue
-            # Find the first line which should be the FILE: line
-            lines = section.strip().split('\n', 1)
-            if len(lines) >= 1 and lines[0].startswith("FILE:"):
-                filename = lines[0][len("FILE:"):].strip()
-                file_content = lines[1].strip() if len(lines) > 1 else ""
-
-                if not filename:
-                    logger.warning("Found empty filename in section, skipping")
-                    continue
-
-                repository_files[filename] = file_content
-                logger.debug(f"Parsed file: {filename} ({len(file_content)} bytes)")
-            else:
-                # Handle cases where the section might not start correctly
-                # Perhaps log a warning or attempt alternative parsing if needed
-                logger.warning(f"Could not parse FILE: line from section: {section[:100]}...")
-
-
-        if not repository_files:
-             logger.warning("No valid file sections found in the repository file.")
-
-        logger.info(f"Successfully parsed {len(repository_files)} files from {file_path}")
-        return repository_files
+# Files longer than this are cut before being added to the generated diff;
+# the analyzer truncates the whole prompt well below a single large file anyway.
+MAX_FILE_CHARS = 10000
+# Leading characters inspected when deciding whether a file is binary
+BINARY_SNIFF_CHARS = 8192
+# Pull requests analyzed in parallel by default; each analysis mostly waits on the LLM API
+DEFAULT_CONCURRENCY = 8
+# On-disk cache of successful analyses, keyed by a hash of the analyzed content
+ANALYSIS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mrqv", "analyses")
+DEFAULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+# On-disk ETags of GitHub search pages, so unchanged pages are revalidated with a free 304
+GITHUB_ETAG_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mrqv", "github_etags")
+# Mirrors gh_fetcher.MAX_PAGE_SIZE, so that --help and argument errors do not import requests
+GITHUB_MAX_PAGE_SIZE = 100
 
-    except FileNotFoundError: # Catch specific error
-        raise # Re-raise to be handled in main
-    except Exception as e:
-        logger.error(f"Error parsing repository file '{file_path}': {str(e)}", exc_info=True)
-        raise # Re-raise to indicate failure
+# --- Input Parsing Functions (moved from analyzer.py) ---
+# parse_repository_file lives in repository_parser.py
 
 def generate_diff_content(repository_files: Dict[str, str]) -> str:
     """
@@ -114,40 +73,43 @@ def generate_diff_content(repository_files: Dict[str, str]) -> str:
     Returns:
         A string containing a unified diff-like representation
     """
-    logger.info(f"Generating pseudo-diff content from {len(repository_files)} files")
+    logger.info("Generating pseudo-diff content from %d files", len(repository_files))
     try:
         if not repository_files:
             logger.warning("No files provided to generate diff content.")
             return ""
 
-        diff_parts = []
+        # Everything is written into one buffer, no list of per-file fragments to join
+        buf = io.StringIO()
 
         for file_path, content in repository_files.items():
-            logger.debug(f"Processing file for diff generation: {file_path}")
+            logger.debug("Processing file for diff generation: %s", file_path)
 
-            # Basic check for binary-like content (optional)
-            # if '\0' in content:
-            #     logger.warning(f"Skipping potentially binary file: {file_path}")
-            #     continue
+            # Cheap length check first, so the scans below only see a bounded slice
+            if len(content) > MAX_FILE_CHARS:
+                content = content[:MAX_FILE_CHARS] + "\n[... TRUNCATED ...]"
 
-            # Create diff format header
-            diff_parts.append(f"--- a/{file_path}") # Indicate original is empty
-            diff_parts.append(f"+++ b/{file_path}") # Indicate new file path
+            # Cheap binary check: NUL bytes in a bounded head sample
+            if '\0' in content[:BINARY_SNIFF_CHARS]:
+                logger.warning("Skipping potentially binary file: %s", file_path)
+                continue
 
-            file_lines = content.split('\n')
-            # Add hunk header (simplistic, assumes all lines added)
-            diff_parts.append(f"@@ -0,0 +1,{len(file_lines)} @@")
+            # Add a blank line between file diffs for readability (optional)
+            if buf.tell():
+                buf.write("\n")
 
-            # Add each line with '+' prefix
-            for line in file_lines:
-                 # Ensure lines don't contain unexpected newlines that break format
-                diff_parts.append(f"+{line.rstrip('\r\n')}")
+            # Create diff format header: original is empty, new file path,
+            # hunk header (simplistic, assumes all lines added)
+            line_count = content.count('\n') + 1
+            buf.write(f"--- a/{file_path}\n+++ b/{file_path}\n@@ -0,0 +1,{line_count} @@\n+")
 
-            # Add a newline between file diffs for readability (optional)
-            diff_parts.append("")
+            # Prefix every line with '+' in one C-level replace, without a line list.
+            # Text-mode reads already normalize '\r\n', so no per-line rstrip is needed.
+            buf.write(content.replace('\n', '\n+'))
+            buf.write("\n")
 
-        full_diff_content = "\n".join(diff_parts)
-        logger.info(f"Successfully generated pseudo-diff content (length: {len(full_diff_content)} chars)")
+        full_diff_content = buf.getvalue()
+        logger.info("Successfully generated pseudo-diff content (length: %d chars)", len(full_diff_content))
 
         # Truncation is now handled primarily within the analyzer/API call
         # but we can add a warning here if it's excessively large.
@@ -155,7 +117,7 @@ def generate_diff_content(repository_files: Dict[str, str]) -> str:
 
         return full_diff_content
     except Exception as e:
-        logger.error(f"Error generating diff content: {str(e)}", exc_info=True)
+        logger.error("Error generating diff content: %s", e, exc_info=True)
         raise
 
 # --- Main Logic ---
@@ -163,7 +125,7 @@ def generate_diff_content(repository_files: Dict[str, str]) -> str:
 def validate_env_vars(use_github: bool):
     """Validate necessary environment variables."""
     if use_github:
-        if not GITHUB_TOKEN:
+        if not os.getenv("GITHUB_TOKEN"):
             logger.error("GITHUB_TOKEN environment variable is missing.")
             sys.exit(1)
         # if not REPO_NAME: # REMOVED Check for REPO_NAME
@@ -173,7 +135,7 @@ def validate_env_vars(use_github: bool):
 
 def run_github_fetch(args, repo_name: str) -> list:
     """Fetches PR data from GitHub."""
-    logger.info(f"Fetching PR data for user '{args.github_user}' in repo '{repo_name}'")
+    logger.info("Fetching PR data for user '%s' in repo '%s'", args.github_user, repo_name)
     try:
         start_date = datetime.fromisoformat(args.start_date)
         end_date = datetime.fromisoformat(args.end_date)
@@ -181,62 +143,171 @@ def run_github_fetch(args, repo_name: str) -> list:
         logger.error("Invalid date format. Please use YYYY-MM-DD.")
         sys.exit(1)
 
+    from app.modules.gh_fetcher import GithubFetcher
+
+    etag_cache = None
+    if not args.no_cache:
+        try:
+            etag_cache = ShelveBackend(GITHUB_ETAG_CACHE_PATH)
+        except Exception as e:
+            logger.warning("GitHub ETag cache unavailable, continuing without it: %s", e)
+
     try:
-        fetcher = GithubFetcher(repo_name=repo_name, github_token=GITHUB_TOKEN)
+        fetcher = GithubFetcher(
+            repo_name=repo_name,
+            github_token=os.getenv("GITHUB_TOKEN"),
+            page_size=args.batch_size,
+            etag_cache=etag_cache,
+        )
         pr_data_list = fetcher.export_pr_data(args.github_user, start_date, end_date)
-        logger.info(f"Fetched {len(pr_data_list)} pull requests from GitHub.")
+        logger.info("Fetched %d pull requests from GitHub.", len(pr_data_list))
         return pr_data_list
     except Exception as e:
-        logger.error(f"Failed to fetch data from GitHub: {e}", exc_info=True)
+        logger.error("Failed to fetch data from GitHub: %s", e, exc_info=True)
         sys.exit(1)
+    finally:
+        if etag_cache is not None:
+            etag_cache.close()
+
+def open_analysis_cache(ttl_seconds: float) -> Optional[LLMCache]:
+    """Open the persistent analysis cache, or return None if it cannot be opened."""
+    try:
+        return LLMCache(ShelveBackend(ANALYSIS_CACHE_PATH), ttl_seconds=ttl_seconds)
+    except Exception as e:
+        # e.g. another run holds the cache lock; analysis still works without it
+        logger.warning("Analysis cache unavailable, continuing without it: %s", e)
+        return None
+
+def _content_key(kind: str, payload: Any, analysis_version: str) -> str:
+    """
+    Digest of the analyzed content; identical PRs or diffs share one cache entry.
+
+    analysis_version (model name and prompt version) is part of the key, so a
+    different model or an edited prompt never gets another one's analysis.
+    """
+    serialized = json.dumps([kind, analysis_version, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return content_digest(serialized.encode('utf-8'))
+
+def cached_analysis(cache: Optional[LLMCache], key: str, analyze: Callable[[], dict]) -> dict:
+    """Return the cached result for key, or run analyze() and cache it unless it failed."""
+    if cache is None:
+        return analyze()
+    result = cache.get(key)
+    if result is not None:
+        logger.info("Using cached analysis %s", key[:12])
+        return result
+    result = analyze()
+    # Errors are usually transient (network, quota), so they are retried next run
+    if isinstance(result, dict) and not result.get("error"):
+        cache.set(key, result)
+    return result
+
+def _analyze_pull_request_safe(analyzer: MergeRequestAnalyzer, pr_data: Any, cache: Optional[LLMCache] = None) -> dict:
+    """Analyze one PR, turning an unexpected exception into an error result."""
+    try:
+        # Analyze using the structured PR data method
+        return cached_analysis(cache, _content_key("pr", pr_data, analyzer.analysis_version), partial(analyzer.analyze_pull_request, pr_data))
+    except Exception as e:
+        # Catch errors during analysis of a specific PR
+        pr_url = pr_data.get('html_url', 'Unknown PR') if isinstance(pr_data, dict) else 'Unknown PR'
+        # One line per failing PR; the traceback is only formatted when DEBUG is enabled
+        logger.warning("Error analyzing PR '%s': %s", pr_url, e)
+        logger.debug("Traceback:", exc_info=True)
+        return {"error": f"Error analyzing PR '{pr_url}': {str(e)}"}
+
+def iter_pull_request_analyses(
+    analyzer: MergeRequestAnalyzer,
+    pr_data_iter: Iterable[Any],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[LLMCache] = None,
+) -> Iterator[dict]:
+    """
+    Analyze pull requests concurrently, yielding results in input order.
 
-def run_analysis_from_file(analyzer: MergeRequestAnalyzer, args) -> list:
+    Each analysis blocks on the LLM API, so threads overlap the waits and wall
+    time drops from N x latency to roughly N / concurrency x latency. Input is
+    pulled lazily with at most 2 x concurrency PRs in flight, so a streamed
+    input never has to be held in memory as a whole.
+
+    If reading the input fails part-way (e.g. malformed JSON), the analyses
+    already submitted are still yielded before the error is re-raised.
+    """
+    analyze = partial(_analyze_pull_request_safe, analyzer, cache=cache)
+    pending = deque()
+    pr_data_iter = iter(pr_data_iter)
+    input_error = None
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            try:
+                pr_data = next(pr_data_iter)
+            except StopIteration:
+                break
+            except Exception as e:
+                input_error = e
+                break
+            if len(pending) >= 2 * concurrency:
+                yield pending.popleft().result()
+            pending.append(executor.submit(analyze, pr_data))
+        while pending:
+            yield pending.popleft().result()
+    if input_error is not None:
+        raise input_error
+
+def analyze_pull_requests(
+    analyzer: MergeRequestAnalyzer,
+    pr_data_list: Iterable[Any],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[LLMCache] = None,
+) -> list:
+    """Analyze pull requests concurrently; results keep the order of pr_data_list."""
+    return list(iter_pull_request_analyses(analyzer, pr_data_list, concurrency, cache))
+
+def run_analysis_from_file(analyzer: MergeRequestAnalyzer, args, cache: Optional[LLMCache] = None) -> list:
     """Runs analysis based on input file type."""
     analysis_results = []
     if args.input_json:
-        logger.info(f"Analyzing PR data from JSON file: {args.input_json}")
+        logger.info("Analyzing PR data from JSON file: %s", args.input_json)
         try:
             with open(args.input_json, 'r', encoding='utf-8') as f:
-                pr_data_list = json.load(f)
-            if not isinstance(pr_data_list, list):
-                logger.error("JSON file should contain a list of PR data objects.")
-                return [] # Return empty list on error
-
-            logger.info(f"Analyzing {len(pr_data_list)} pull requests from JSON file")
-            for pr_data in pr_data_list:
+                # PRs are decoded one at a time and analyzed while the rest of the file is read
+                pr_data_iter = json_codec.iter_array(f)
                 # Use analyze_pull_request for structured JSON input
-                analysis = analyzer.analyze_pull_request(pr_data)
-                analysis_results.append(analysis)
+                for analysis in iter_pull_request_analyses(analyzer, pr_data_iter, args.concurrency, cache):
+                    analysis_results.append(analysis)
+            logger.info("Analyzed %d pull requests from JSON file", len(analysis_results))
+        except json_codec.NotAnArrayError:
+            logger.error("JSON file should contain a list of PR data objects.")
+            return [] # Return empty list on error
         except FileNotFoundError:
-            logger.error(f"Error: Input JSON file '{args.input_json}' not found")
+            logger.error("Error: Input JSON file '%s' not found", args.input_json)
             # Optionally return specific error structure or re-raise
             analysis_results.append({"error": f"File not found: {args.input_json}"})
-        except json.JSONDecodeError:
-            logger.error(f"Error: '{args.input_json}' is not a valid JSON file")
+        except json_codec.JSONDecodeError:
+            logger.error("Error: '%s' is not a valid JSON file", args.input_json)
             analysis_results.append({"error": f"Invalid JSON in file: {args.input_json}"})
         except Exception as e:
-            logger.error(f"Error processing JSON file '{args.input_json}': {e}", exc_info=True)
+            logger.error("Error processing JSON file '%s': %s", args.input_json, e, exc_info=True)
             analysis_results.append({"error": f"Error processing JSON file '{args.input_json}': {str(e)}"})
 
 
     elif args.input_diff:
-        logger.info(f"Analyzing diff file: {args.input_diff}")
+        logger.info("Analyzing diff file: %s", args.input_diff)
         try:
             with open(args.input_diff, 'r', encoding='utf-8') as f:
                 diff_content = f.read()
             # Use analyze_code_changes for raw diff input
-            analysis = analyzer.analyze_code_changes(diff_content)
+            analysis = cached_analysis(cache, _content_key("diff", diff_content, analyzer.analysis_version), partial(analyzer.analyze_code_changes, diff_content))
             analysis_results.append(analysis)
         except FileNotFoundError:
-            logger.error(f"Error: Input diff file '{args.input_diff}' not found")
+            logger.error("Error: Input diff file '%s' not found", args.input_diff)
             analysis_results.append({"error": f"File not found: {args.input_diff}"})
         except Exception as e:
-            logger.error(f"Error processing diff file '{args.input_diff}': {e}", exc_info=True)
+            logger.error("Error processing diff file '%s': %s", args.input_diff, e, exc_info=True)
             analysis_results.append({"error": f"Error processing diff file '{args.input_diff}': {str(e)}"})
 
 
     elif args.input_repo:
-        logger.info(f"Analyzing repository file: {args.input_repo}")
+        logger.info("Analyzing repository file: %s", args.input_repo)
         try:
             # 1. Parse the repo file using the moved function
             repository_files = parse_repository_file(args.input_repo)
@@ -260,60 +331,68 @@ def run_analysis_from_file(analyzer: MergeRequestAnalyzer, args) -> list:
                     })
                 else:
                      # 3. Analyze the generated diff content
-                    analysis = analyzer.analyze_code_changes(diff_content)
+                    analysis = cached_analysis(cache, _content_key("diff", diff_content, analyzer.analysis_version), partial(analyzer.analyze_code_changes, diff_content))
                     analysis_results.append(analysis)
 
         except FileNotFoundError: # Already caught by parse_repository_file, but good practice
-             logger.error(f"Error: Input repository file '{args.input_repo}' not found")
+             logger.error("Error: Input repository file '%s' not found", args.input_repo)
              analysis_results.append({"error": f"File not found: {args.input_repo}"})
         except Exception as e:
             # Catch potential errors from parsing or diff generation
-            logger.error(f"Error processing repository file '{args.input_repo}': {e}", exc_info=True)
+            logger.error("Error processing repository file '%s': %s", args.input_repo, e, exc_info=True)
             analysis_results.append({"error": f"Error processing repository file '{args.input_repo}': {str(e)}"})
 
     return analysis_results
 
-def run_analysis_from_github(analyzer: MergeRequestAnalyzer, pr_data_list: list) -> list:
+def run_analysis_from_github(
+    analyzer: MergeRequestAnalyzer,
+    pr_data_list: list,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    cache: Optional[LLMCache] = None,
+) -> list:
     """Runs analysis on PR data fetched from GitHub."""
-    analysis_results = []
-    logger.info(f"Analyzing {len(pr_data_list)} pull requests fetched from GitHub")
-    for pr_data in pr_data_list:
-        try:
-            # Analyze using the structured PR data method
-            analysis = analyzer.analyze_pull_request(pr_data)
-            analysis_results.append(analysis)
-        except Exception as e:
-            # Catch errors during analysis of a specific PR
-            pr_url = pr_data.get('html_url', 'Unknown PR')
-            logger.error(f"Error analyzing PR '{pr_url}': {e}", exc_info=True)
-            analysis_results.append({"error": f"Error analyzing PR '{pr_url}': {str(e)}"})
+    logger.info("Analyzing %d pull requests fetched from GitHub", len(pr_data_list))
+    return analyze_pull_requests(analyzer, pr_data_list, concurrency, cache)
 
-    return analysis_results
+def write_results(analysis_results: Iterable[dict], fp: TextIO):
+    """
+    Write analysis results to fp as a JSON array, one element at a time.
+
+    The layout matches json.dumps(results, indent=2), but only a single
+    serialized result is held in memory at once. Elements are encoded with
+    json_codec, i.e. orjson when it is installed.
+    """
+    fp.write("[")
+    separator = "\n  "
+    for res in analysis_results:
+        fp.write(separator)
+        # Newlines inside JSON strings are escaped, so every raw newline is structural
+        fp.write(json_codec.dumps(res).replace("\n", "\n  "))
+        separator = ",\n  "
+    fp.write("\n]")
 
 def output_results(analysis_results: list, output_file: str | None):
     """Outputs analysis results to stdout or a file."""
-    # Filter out potential null/empty results if needed, or keep them
-    valid_results = [res for res in analysis_results if res] # Simple filter
-    if not valid_results:
+    # Filter out potential null/empty results while writing, without copying the list
+    if not any(analysis_results):
         logger.warning("No valid analysis results to output.")
         return
 
-    output_json = json.dumps(valid_results, indent=2)
-
     if output_file:
         try:
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(output_json)
-            logger.info(f"Analysis results saved to: {output_file}")
+                write_results(filter(None, analysis_results), f)
+            logger.info("Analysis results saved to: %s", output_file)
         except IOError as e:
-            logger.error(f"Error writing output file '{output_file}': {e}")
+            logger.error("Error writing output file '%s': %s", output_file, e)
             # Fallback to stdout if write fails
             print("\n--- Analysis Results (stdout due to file error) ---")
-            print(output_json)
-            print("----------------------------------------------------\n")
+            write_results(filter(None, analysis_results), sys.stdout)
+            print("\n----------------------------------------------------\n")
             sys.exit(1)
     else:
-        print(output_json)
+        write_results(filter(None, analysis_results), sys.stdout)
+        sys.stdout.write("\n")
 
 def main():
     parser = argparse.ArgumentParser(description="Analyze Pull Request data for quality.")
@@ -327,8 +406,16 @@ def main():
     parser.add_argument("--github_repo", help="GitHub repository name (e.g., 'owner/repo'). Required if --github_user is specified.")
     parser.add_argument("--start_date", help="Start date (YYYY-MM-DD) for GitHub fetch.")
     parser.add_argument("--end_date", help="End date (YYYY-MM-DD) for GitHub fetch.")
+    parser.add_argument("--batch_size", type=int, default=GITHUB_MAX_PAGE_SIZE,
+                        help=f"Results per page of GitHub list requests, 1-{GITHUB_MAX_PAGE_SIZE} (default: {GITHUB_MAX_PAGE_SIZE}).")
 
     parser.add_argument("--output", help="Output file for analysis results (JSON format, default: stdout).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Number of pull requests analyzed in parallel (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--no_cache", action="store_true",
+                        help=f"Do not read or write the on-disk analysis and GitHub ETag caches (under {os.path.dirname(ANALYSIS_CACHE_PATH)}).")
+    parser.add_argument("--cache_ttl", type=float, default=DEFAULT_CACHE_TTL_SECONDS,
+                        help=f"Seconds a cached analysis stays valid (default: {DEFAULT_CACHE_TTL_SECONDS}).")
 
     args = parser.parse_args()
 
@@ -336,25 +423,41 @@ def main():
     use_github = bool(args.github_user)
     if use_github and (not args.start_date or not args.end_date or not args.github_repo):
         parser.error("--start_date, --end_date, and --github_repo are required when using --github_user.")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
+    if not 1 <= args.batch_size <= GITHUB_MAX_PAGE_SIZE:
+        parser.error(f"--batch_size must be between 1 and {GITHUB_MAX_PAGE_SIZE}.")
+
+    # Heavy imports are deferred until the arguments are valid, so --help and usage
+    # errors return without loading dotenv, requests or the Yandex Cloud SDK
+    from dotenv import load_dotenv
+
+    # Load environment variables for GitHub Fetcher and Analyzer
+    load_dotenv()
 
     # Validate environment variables based on input mode
     validate_env_vars(use_github)
 
+    cache = None
     try:
+        from app.modules.analyzer import MergeRequestAnalyzer
+
         # Initialize the analyzer (checks its own env vars)
         analyzer = MergeRequestAnalyzer()
         analysis_results = []
+        if not args.no_cache:
+            cache = open_analysis_cache(args.cache_ttl)
 
         if use_github:
             pr_data_list = run_github_fetch(args, args.github_repo)
             if pr_data_list:
-                analysis_results = run_analysis_from_github(analyzer, pr_data_list)
+                analysis_results = run_analysis_from_github(analyzer, pr_data_list, args.concurrency, cache)
             else:
                 logger.info("No PRs found for the specified criteria on GitHub.")
         else:
             # Analysis from file (JSON, diff, or repo)
             # run_analysis_from_file now returns a list containing analysis result(s)
-            analysis_results = run_analysis_from_file(analyzer, args)
+            analysis_results = run_analysis_from_file(analyzer, args, cache)
 
         if analysis_results:
             # Check if any result actually contains an error reported by analyzer/parsing
@@ -370,8 +473,11 @@ def main():
 
     except Exception as e:
         # Catch-all for unexpected errors during setup or orchestration
-        logger.critical(f"An unexpected critical error occurred in main execution: {str(e)}", exc_info=True)
+        logger.critical("An unexpected critical error occurred in main execution: %s", e, exc_info=True)
         sys.exit(1)
+    finally:
+        if cache is not None:
+            cache.close()
 
 if __name__ == "__main__":
     main()
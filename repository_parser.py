@@ -1,6 +1,121 @@
+import logging
+import mmap
 import os
-import re
-from typing import Dict, List, Tuple, Optional
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_FILE_PREFIX = b"FILE: "
+_FILE_DELIMITER = b"================================================"
+# Byte values str.strip() would remove at the ends of an ASCII-bounded section
+_WHITESPACE_BYTES = frozenset(b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+# Write buffer for saved files, so large files go out in few write() calls
+WRITE_BUFFER_SIZE = 1 << 20
+# Threads writing saved files; disk writes are I/O bound, so more than the core count
+WRITE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+def _decode_text(raw: bytes) -> str:
+    """Decode a byte slice the way a text-mode read would (UTF-8, universal newlines)."""
+    text = raw.decode('utf-8', errors='replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def _find_file_header(mm: mmap.mmap, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Locate the first non-empty 'FILE: <name>' line in mm[start:end]; return the name's span."""
+    while True:
+        prefix_pos = mm.find(_FILE_PREFIX, start, end)
+        if prefix_pos == -1:
+            return None
+        name_start = prefix_pos + len(_FILE_PREFIX)
+        name_end = mm.find(b"\n", name_start, end)
+        if name_end == -1:
+            return None
+        # A lone '\r' is an empty name followed by a CRLF line ending
+        if name_end > name_start and mm[name_start:name_end] != b"\r":
+            return name_start, name_end
+        start = name_start
+
+def _find_delimiter(mm: mmap.mmap, pos: int) -> Optional[Tuple[int, int]]:
+    """
+    Locate the next delimiter line at or after pos.
+
+    Only a delimiter that fills a whole line separates sections: it must start
+    a line and be followed by a line ending or the end of the file, so banner
+    comments and Markdown/RST underlines inside a file are left alone.
+
+    Returns:
+        Start of the delimiter and start of the next section, or None
+    """
+    size = len(mm)
+    while True:
+        found = mm.find(_FILE_DELIMITER, pos)
+        if found == -1:
+            return None
+        pos = found + len(_FILE_DELIMITER)
+        if found and mm[found - 1] != 0x0A:
+            continue
+        if pos == size:
+            return found, size
+        if mm[pos] == 0x0A:
+            return found, pos + 1
+        if mm[pos:pos + 2] == b"\r\n":
+            return found, pos + 2
+
+def _trim_span(mm: mmap.mmap, start: int, end: int) -> Tuple[int, int]:
+    """Narrow mm[start:end] past leading and trailing ASCII whitespace without copying it."""
+    while start < end and mm[start] in _WHITESPACE_BYTES:
+        start += 1
+    while end > start and mm[end - 1] in _WHITESPACE_BYTES:
+        end -= 1
+    return start, end
+
+def iter_repository_sections(file_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (filename, content) for each file section of a repository file.
+
+    The file is memory-mapped and walked delimiter line by delimiter line, so only the
+    sections that contain a FILE: header are ever copied and decoded, one at
+    a time.
+    
+    Args:
+        file_path: Path to the repository file
+        
+    Yields:
+        Tuples of file path and file content
+    """
+    with open(file_path, 'rb') as f:
+        # mmap cannot map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            pos = 0
+            while pos <= size:
+                delimiter = _find_delimiter(mm, pos)
+                section_end = size if delimiter is None else delimiter[0]
+
+                # Extract filename and content; sections without a FILE: line
+                # (like the directory structure) are skipped without copying
+                file_header = _find_file_header(mm, pos, section_end)
+                if file_header:
+                    name_start, name_end = file_header
+                    filename = _decode_text(mm[name_start:name_end]).strip()
+                    
+                    # Get content after the FILE: line; trimming the span first means only
+                    # the kept bytes are copied, and the final strip() is normally a no-op
+                    content_start, content_end = _trim_span(mm, name_end + 1, section_end)
+                    file_content = _decode_text(mm[content_start:content_end]).strip()
+                    
+                    yield filename, file_content
+
+                if delimiter is None:
+                    break
+                pos = delimiter[1]
 
 def parse_repository_file(file_path: str) -> Dict[str, str]:
     """
@@ -11,64 +126,107 @@ def parse_repository_file(file_path: str) -> Dict[str, str]:
         
     Returns:
         Dictionary mapping file paths to their content
+
+    Raises:
+        FileNotFoundError: If file_path does not exist
     """
-    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-        content = f.read()
-    
-    # Parse directory structure (optional)
-    directory_structure = None
-    if content.startswith("Directory structure:"):
-        structure_end_idx = content.find("\n\n")
-        if structure_end_idx != -1:
-            directory_structure = content[:structure_end_idx].strip()
-    
-    # Split content into file sections using the delimiter
-    file_delimiter = "================================================"
-    file_sections = content.split(file_delimiter)
-    
-    # Remove any sections before the first file (like directory structure)
-    file_sections = [section for section in file_sections if "FILE: " in section]
-    
-    # Process each file section
-    repository_files = {}
-    for section in file_sections:
-        # Extract filename and content
-        file_match = re.search(r"FILE: (.+?)\n", section)
-        if file_match:
-            filename = file_match.group(1).strip()
-            
-            # Get content after the FILE: line
-            content_start = file_match.end()
-            file_content = section[content_start:].strip()
-            
-            # Store in dictionary
+    logger.info("Parsing repository file: %s", file_path)
+    try:
+        # Check if file exists
+        if not os.path.isfile(file_path):
+            logger.error("Repository file does not exist: %s", file_path)
+            raise FileNotFoundError(f"Repository file does not exist: {file_path}")
+
+        if os.path.getsize(file_path) == 0:
+            logger.warning("Repository file is empty")
+            return {}
+
+        repository_files = {}
+        for filename, file_content in iter_repository_sections(file_path):
             repository_files[filename] = file_content
+            logger.debug("Parsed file: %s (%d bytes)", filename, len(file_content))
+
+        if not repository_files:
+            logger.warning("No valid file sections found in the repository file.")
+
+        logger.info("Successfully parsed %d files from %s", len(repository_files), file_path)
+        return repository_files
+
+    except FileNotFoundError:
+        raise # Re-raise to be handled by the caller
+    except Exception as e:
+        logger.error("Error parsing repository file '%s': %s", file_path, e, exc_info=True)
+        raise
+
+def _write_file(target_path: str, content: str, created_dirs: Set[str], dirs_lock: threading.Lock) -> str:
+    """Write one parsed file, creating its directory the first time it is seen."""
+    target_dir = os.path.dirname(target_path)
+    # Held while creating, so no writer can run ahead of its directory
+    with dirs_lock:
+        if target_dir not in created_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+            created_dirs.add(target_dir)
     
-    return repository_files
+    with open(target_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(content)
+    return target_path
 
-def save_parsed_repository(repository_files: Dict[str, str], output_dir: str) -> List[str]:
+def save_parsed_repository(
+    repository_files: Union[Dict[str, str], Iterable[Tuple[str, str]]], output_dir: str
+) -> List[str]:
     """
     Save the parsed repository files to the given output directory.
+
+    Files are written by a thread pool (file writes release the GIL) while
+    the next sections are still being parsed; at most 2 x WRITE_WORKERS files
+    are pending at once, so a streamed input is never buffered as a whole.
+    A path that appears more than once is written in input order, so the last
+    entry wins as it would in a dict.
     
     Args:
-        repository_files: Dictionary mapping file paths to their content
+        repository_files: Dictionary mapping file paths to their content, or an
+                          iterable of (file path, content) pairs such as
+                          iter_repository_sections, written as they arrive
         output_dir: Directory where to save the parsed files
         
     Returns:
-        List of saved file paths
+        List of saved file paths, each once, in order of first appearance
     """
     saved_files = []
+    seen_paths: Set[str] = set()
+    # Path -> its latest write still pending; a repeated path waits on it first
+    in_flight: Dict[str, Future] = {}
+    # Many files share a directory; create each one only once
+    created_dirs: Set[str] = set()
+    dirs_lock = threading.Lock()
+    if isinstance(repository_files, dict):
+        repository_files = repository_files.items()
     
-    for file_path, content in repository_files.items():
-        # Create the target directory if needed
-        target_path = os.path.join(output_dir, file_path)
-        os.makedirs(os.path.dirname(target_path), exist_ok=True)
-        
-        # Write file content
-        with open(target_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        saved_files.append(target_path)
+    pending = deque()
+
+    def collect() -> None:
+        target_path, future = pending.popleft()
+        future.result()
+        if in_flight.get(target_path) is future:
+            del in_flight[target_path]
+
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        for file_path, content in repository_files:
+            if len(pending) >= 2 * WRITE_WORKERS:
+                collect()
+            target_path = os.path.join(output_dir, file_path)
+            if target_path in seen_paths:
+                previous = in_flight.get(target_path)
+                if previous is not None:
+                    previous.result()
+            else:
+                seen_paths.add(target_path)
+                saved_files.append(target_path)
+            future = executor.submit(_write_file, target_path, content, created_dirs, dirs_lock)
+            in_flight[target_path] = future
+            pending.append((target_path, future))
+        while pending:
+            collect()
     
     return saved_files
 
@@ -84,10 +242,10 @@ if __name__ == "__main__":
     output_dir = sys.argv[2]
     
     try:
-        repository_files = parse_repository_file(repo_file)
-        saved_files = save_parsed_repository(repository_files, output_dir)
+        # Stream sections straight to disk instead of collecting them first
+        saved_files = save_parsed_repository(iter_repository_sections(repo_file), output_dir)
         
-        print(f"Successfully parsed {len(repository_files)} files.")
+        print(f"Successfully parsed {len(saved_files)} files.")
         print(f"Files saved to {output_dir}")
     except Exception as e:
         print(f"Error: {str(e)}")